@@ -3,34 +3,119 @@ import re
 import time
 import ast
 import json
+import hashlib
+import html
+import threading
 import streamlit as st
 import requests
 
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
+from functools import partial
+from urllib.request import urlopen
 from crewai import Agent, Task, Crew, LLM
-from amadeus import Client, ResponseError
+from amadeus import Client, ResponseError, ClientError, NotFoundError
 from crewai.tools import tool
 from tabulate import tabulate
+from circuit_breaker import CircuitOpenError, get_breaker, breaker_states
+from shared_cache import cache_get, cache_get_stale, cache_set
+from hotel_ranking import AMENITY_CHOICES, compact_hotel, rank_hotels
 
 # Load env variables
 load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_PLACES_API_KEY")
+# Upstream endpoints can be overridden, e.g. to point at the load-testing stubs (see loadtest/)
+GOOGLE_PLACES_BASE_URL = os.getenv("GOOGLE_PLACES_BASE_URL", "https://maps.googleapis.com/maps/api/place").rstrip("/")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+
+# Hotel photo thumbnails are fetched from Google once and served from local disk
+PHOTO_CACHE_DIR = os.getenv("PHOTO_CACHE_DIR", os.path.join(".cache", "photos"))
+PHOTO_CACHE_URL = os.getenv("PHOTO_CACHE_URL")  # e.g. "/photos/" when nginx serves PHOTO_CACHE_DIR
+PHOTO_CACHE_MAX_MB = int(os.getenv("PHOTO_CACHE_MAX_MB", "200"))
+PHOTO_THUMBNAIL_WIDTH = 200
+
+# Upstream timeouts (seconds) and per-provider circuit breaker settings.
+# Each provider endpoint (e.g. amadeus.flight_offers, google.details) gets its own breaker.
+AMADEUS_TIMEOUT = float(os.getenv("AMADEUS_TIMEOUT", "15"))
+GOOGLE_PLACES_TIMEOUT = float(os.getenv("GOOGLE_PLACES_TIMEOUT", "5"))
+BREAKER_SETTINGS = {
+    "amadeus": {"slow_call_seconds": 8.0, "reset_timeout": 30.0},
+    "google": {"slow_call_seconds": 3.0, "reset_timeout": 30.0},
+}
+PLACES_OK_STATUSES = {"OK", "ZERO_RESULTS", "NOT_FOUND", "INVALID_REQUEST"}
+
+# Shared cache TTLs in seconds (shared_cache.py; one cache for all replica processes)
+IATA_CACHE_TTL = 30 * 24 * 3600
+PLACES_CACHE_TTL = 24 * 3600
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "300"))
 
 # === LLM: Groq ===
 llm = LLM(
-    model="llama-3.1-8b-instant",
+    model="groq/llama-3.1-8b-instant",
     api_key=os.getenv("GROQ_API_KEY"),
-    base_url="https://api.groq.com/openai/v1"
+    base_url=GROQ_BASE_URL
 )
 
 # === Amadeus Setup ===
+# The SDK also reads AMADEUS_HOST / AMADEUS_PORT from the environment; AMADEUS_SSL is
+# parsed here because the SDK would treat the string "false" as truthy.
 amadeus = Client(
     client_id=os.getenv("AMADEUS_CLIENT_ID"),
     client_secret=os.getenv("AMADEUS_CLIENT_SECRET"),
-    hostname="test" if os.getenv("AMADEUS_ENV") == "test" else "production"
+    hostname="test" if os.getenv("AMADEUS_ENV") == "test" else "production",
+    ssl=os.getenv("AMADEUS_SSL", "true").lower() != "false",
+    http=partial(urlopen, timeout=AMADEUS_TIMEOUT)
 )
 
+# === Provider Calls (circuit breakers) ===
+def _amadeus_is_failure(error):
+    """Bad requests and unknown resources are answered fine; they don't mean Amadeus is unhealthy."""
+    return not isinstance(error, (ClientError, NotFoundError))
+
+def amadeus_call(endpoint: str, fn, **params):
+    """Call an Amadeus SDK method through the `amadeus.<endpoint>` circuit breaker."""
+    breaker = get_breaker(f"amadeus.{endpoint}", **BREAKER_SETTINGS["amadeus"])
+    return breaker.call(fn, is_failure=_amadeus_is_failure, **params)
+
+def google_places_get(endpoint: str, params: dict, as_json: bool = True):
+    """
+    GET a Google Places endpoint (e.g. "details/json") through the `google.<name>` circuit breaker.
+    Returns parsed JSON, or raw bytes when as_json is False. Raises CircuitOpenError when open.
+    """
+    def fetch():
+        # requests puts the full URL (including the API key) into its error messages, and
+        # callers may show errors to the user: re-raise with the endpoint name only
+        try:
+            resp = requests.get(f"{GOOGLE_PLACES_BASE_URL}/{endpoint}", params={**params, "key": GOOGLE_API_KEY},
+                                timeout=GOOGLE_PLACES_TIMEOUT)
+        except requests.RequestException as e:
+            raise requests.RequestException(f"Places {endpoint} request failed ({type(e).__name__})") from None
+        if resp.status_code >= 400:
+            raise requests.HTTPError(f"Places {endpoint} returned HTTP {resp.status_code}")
+        if not as_json:
+            return resp.content
+        data = resp.json()
+        # Places reports quota/server problems with HTTP 200 and an error status
+        if data.get("status") and data["status"] not in PLACES_OK_STATUSES:
+            raise requests.HTTPError(f"Places {endpoint} returned status {data['status']}")
+        return data
+
+    breaker = get_breaker(f"google.{endpoint.split('/')[0]}", **BREAKER_SETTINGS["google"])
+    return breaker.call(fetch)
+
+def _stale_results(namespace: str, cache_key):
+    """Last good results for cache_key from the shared cache, each marked stale, or None."""
+    entry = cache_get_stale(namespace, cache_key)
+    if not entry or not entry[0]:
+        return None
+    results, stored_at = entry
+    cached_at = datetime.fromtimestamp(stored_at).isoformat(timespec="seconds")
+    return [{**r, "stale": True, "cached_at": cached_at} for r in results]
+
+def _degraded_results(namespace: str, cache_key, message: str):
+    """Fall back to the last good results for cache_key (marked stale), or an error dict."""
+    return _stale_results(namespace, cache_key) or {"error": message}
+
 # === Helpers ===
 def safe_llm_call(*args, max_retries=3, **kwargs):
     """Call llm.call with simple retry on rate limit-like errors."""
@@ -169,11 +254,84 @@ FALLBACK_IATA = {
     "lagos": "LOS",
 }
 
+# === Photo Cache ===
+def _photo_cache_path(photo_ref: str):
+    """Local thumbnail path for a Google Places photo_reference."""
+    digest = hashlib.sha256(photo_ref.encode("utf-8")).hexdigest()[:32]
+    return os.path.join(PHOTO_CACHE_DIR, f"{digest}_{PHOTO_THUMBNAIL_WIDTH}.jpg")
+
+def _evict_photo_cache(keep: str):
+    """Delete least recently used thumbnails (except `keep`) until the cache fits PHOTO_CACHE_MAX_MB."""
+    max_bytes = PHOTO_CACHE_MAX_MB * 1024 * 1024
+    entries = []
+    total = 0
+    for entry in os.scandir(PHOTO_CACHE_DIR):
+        if entry.is_file() and entry.name.endswith(".jpg"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+    if total <= max_bytes:
+        return
+    # mtime is bumped on every cache hit, so oldest mtime == least recently used
+    for _, size, path in sorted(entries):
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        if total <= max_bytes:
+            break
+
+def get_photo_thumbnail(photo_ref: str):
+    """
+    Return a displayable thumbnail for a Google Places photo_reference.
+    The photo is fetched from Google at thumbnail width once and stored on disk;
+    later calls are served from the cache. Returns a URL under PHOTO_CACHE_URL when
+    nginx serves the cache directory, otherwise the local file path. None on failure.
+    """
+    if not photo_ref or not GOOGLE_API_KEY:
+        return None
+    path = _photo_cache_path(photo_ref)
+    if os.path.exists(path):
+        try:
+            os.utime(path)  # mark as recently used for LRU eviction
+        except OSError:
+            pass
+    else:
+        tmp_path = None
+        try:
+            content = google_places_get(
+                "photo", {"maxwidth": PHOTO_THUMBNAIL_WIDTH, "photoreference": photo_ref}, as_json=False
+            )
+            os.makedirs(PHOTO_CACHE_DIR, exist_ok=True)
+            # write to a temp file first so concurrent readers never see a partial image
+            # (per process and thread: Streamlit sessions that miss on the same photo run concurrently)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+            _evict_photo_cache(keep=path)
+        except Exception:
+            # eviction only counts .jpg files, so a leftover temp file would never be removed
+            if tmp_path:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return None
+    if PHOTO_CACHE_URL:
+        return PHOTO_CACHE_URL.rstrip("/") + "/" + os.path.basename(path)
+    return path
+
 def display_flight_results(flights):
     """Display flight results in a user-friendly format"""
     if not flights:
         st.warning("No flights found")
         return
+    if flights[0].get("stale"):
+        st.warning(f"⚠️ Live flight search is temporarily unavailable. Showing cached results from {flights[0].get('cached_at')}.")
     
     for i, flight in enumerate(flights):
         with st.container():
@@ -209,15 +367,20 @@ def display_hotel_results(hotels):
     if not hotels:
         st.warning("No hotels found")
         return
+    if hotels[0].get("stale"):
+        st.warning(f"⚠️ Live hotel search is temporarily unavailable. Showing cached results from {hotels[0].get('cached_at')}.")
     
     for i, hotel in enumerate(hotels):
         with st.container():
             col1, col2 = st.columns([1, 2])
             
             with col1:
-                # Display hotel image if available
-                if hotel.get('image') or hotel.get('google_photo'):
-                    image_url = hotel.get('google_photo') or hotel.get('image')
+                # Display hotel image if available (Google photos come from the local thumbnail cache)
+                image_url = get_photo_thumbnail(hotel.get('google_photo_ref')) or hotel.get('image')
+                if image_url and PHOTO_CACHE_URL and image_url.startswith(PHOTO_CACHE_URL.rstrip("/") + "/"):
+                    # Served by nginx, not Streamlit: st.image would try to open it as a local file
+                    st.markdown(f'<img src="{html.escape(image_url)}" width="200">', unsafe_allow_html=True)
+                elif image_url:
                     try:
                         st.image(image_url, width=200)
                     except:
@@ -242,12 +405,21 @@ def display_hotel_results(hotels):
                 if hotel.get('category'):
                     st.write(f"🏆 Category: {hotel.get('category')} stars")
                 
-                # Price
-                price = hotel.get('price')
-                currency = hotel.get('currency')
+                # Price (ranked results carry the best offer's per-night price)
                 check_in = hotel.get('check_in')
                 check_out = hotel.get('check_out')
-                st.write(f"**💰 {currency} {price}** ({check_in} to {check_out})")
+                if hotel.get('price_per_night') is not None:
+                    currency = hotel.get('ranking_currency')
+                    st.write(f"**💰 {currency} {hotel['price_per_night']:.2f}/night** "
+                             f"({currency} {hotel['total_price']:.2f} total, {check_in} to {check_out})")
+                    if hotel.get('offers_compared', 0) > 1:
+                        low, high = hotel['price_range_per_night']
+                        st.caption(f"Best of {hotel['offers_compared']} offers ({currency} {low:.2f}–{high:.2f}/night)")
+                else:
+                    st.write(f"**💰 {hotel.get('currency')} {hotel.get('price')}** ({check_in} to {check_out})")
+                if hotel.get('matched_amenities') or hotel.get('missing_amenities'):
+                    have = ", ".join(a.replace('_', ' ').lower() for a in hotel['matched_amenities']) or "none"
+                    st.write(f"✅ Amenities: {have}")
                 
                 # Website link
                 if hotel.get('google_website'):
@@ -258,49 +430,60 @@ def display_hotel_results(hotels):
 def get_google_place_details(hotel_name: str, city_code: str):
     """
     Fetch hotel details from Google Places API using text search + details API.
-    Returns dict with rating, photo_url, user_ratings_total, etc.
+    Returns dict with rating, photo reference, user_ratings_total, etc., or None if
+    there is no match. While Places is failing the dict only holds stale details (if
+    any) and "places_degraded": True.
     """
     if not GOOGLE_API_KEY:
         return None
 
+    cache_key = (hotel_name, city_code)
+    cached = cache_get("places", cache_key)
+    if cached is not None:
+        return cached or None  # {} caches "no match"
+
     try:
         # Step 1: Text Search
         query = f"{hotel_name} {city_code}"
-        textsearch_url = f"https://maps.googleapis.com/maps/api/place/textsearch/json"
-        params = {"query": query, "key": GOOGLE_API_KEY}
-        resp = requests.get(textsearch_url, params=params).json()
+        resp = google_places_get("textsearch/json", {"query": query})
         if not resp.get("results"):
+            cache_set("places", cache_key, {}, PLACES_CACHE_TTL)
             return None
 
         place = resp["results"][0]
         place_id = place.get("place_id")
 
         # Step 2: Place Details
-        details_url = f"https://maps.googleapis.com/maps/api/place/details/json"
         fields = "name,rating,user_ratings_total,formatted_address,photos,website"
-        d_params = {"place_id": place_id, "fields": fields, "key": GOOGLE_API_KEY}
-        d_resp = requests.get(details_url, params=d_params).json()
+        d_resp = google_places_get("details/json", {"place_id": place_id, "fields": fields})
         if not d_resp.get("result"):
+            cache_set("places", cache_key, {}, PLACES_CACHE_TTL)
             return None
 
         result = d_resp["result"]
 
-        # Construct photo URL if available
-        photo_url = None
+        # Keep only the photo reference; the image itself is served by the thumbnail cache
+        # so the API key never ends up in a browser-facing URL
+        photo_ref = None
         if "photos" in result and result["photos"]:
-            ref = result["photos"][0]["photo_reference"]
-            photo_url = f"https://maps.googleapis.com/maps/api/place/photo?maxwidth=800&photoreference={ref}&key={GOOGLE_API_KEY}"
+            photo_ref = result["photos"][0].get("photo_reference")
 
-        return {
+        details = {
             "google_rating": result.get("rating"),
             "google_reviews": result.get("user_ratings_total"),
             "google_address": result.get("formatted_address"),
             "google_website": result.get("website"),
-            "google_photo": photo_url
+            "google_photo_ref": photo_ref
         }
+        cache_set("places", cache_key, details, PLACES_CACHE_TTL)
+        return details
+    except CircuitOpenError:
+        # Places is degraded: use expired details if we have them, else leave the hotel unenriched
+        stale = cache_get_stale("places", cache_key)
+        return {**(stale[0] if stale else {}), "places_degraded": True}
     except Exception as e:
         st.error(f"Google Places error: {e}")
-        return None
+        return {"places_degraded": True}
 
 def get_iata_code(city_name: str):
     """
@@ -313,24 +496,37 @@ def get_iata_code(city_name: str):
     # If already 3-letter code, return uppercase
     if re.fullmatch(r"[A-Za-z]{3}", name):
         return name.upper()
+    key = name.lower()
+    cached = cache_get("iata", key)
+    if cached:
+        return cached
     # First try Amadeus lookup
     try:
-        resp = amadeus.reference_data.locations.get(keyword=name, subType=["CITY", "AIRPORT"])
+        resp = amadeus_call("locations", amadeus.reference_data.locations.get, keyword=name, subType=["CITY", "AIRPORT"])
         if resp and getattr(resp, "data", None):
             first = resp.data[0]
             iata = first.get("iataCode") or first.get("id")
             if iata:
+                cache_set("iata", key, iata.upper(), IATA_CACHE_TTL)
                 return iata.upper()
-    except Exception:
-        # ignore and fallback
+    except (CircuitOpenError, ResponseError, OSError):
+        # lookup failed or Amadeus is degraded (the breaker records it); use the fallback map
         pass
     # fallback mapping
-    key = name.lower()
     return FALLBACK_IATA.get(key)
 
 # === Flight Search ===
 def _search_flights(origin: str, destination: str, departure_date: str, currency: str = "USD", return_date: str | None = None, non_stop: bool = False):
-    """Search flights using Amadeus API (plain function, safe for direct calls)."""
+    """
+    Search flights using Amadeus API (plain function, safe for direct calls).
+    Results are shared across replicas through the shared cache for SEARCH_CACHE_TTL.
+    When Amadeus is failing or its circuit breaker is open, the last good results
+    for the same search are returned with "stale": True.
+    """
+    cache_key = (origin, destination, departure_date, currency, return_date, non_stop)
+    cached = cache_get("flights", cache_key)
+    if cached is not None:
+        return cached
     try:
         params = {
             "originLocationCode": origin,
@@ -345,7 +541,7 @@ def _search_flights(origin: str, destination: str, departure_date: str, currency
         if non_stop:
             params["nonStop"] = "true"
 
-        response = amadeus.shopping.flight_offers_search.get(**params)
+        response = amadeus_call("flight_offers", amadeus.shopping.flight_offers_search.get, **params)
 
         results = []
         for offer in response.data[:8]:
@@ -381,8 +577,15 @@ def _search_flights(origin: str, destination: str, departure_date: str, currency
                 })
 
             results.append(flight_data)
+        cache_set("flights", cache_key, results, SEARCH_CACHE_TTL)
         return results
+    except (CircuitOpenError, OSError):
+        return _degraded_results("flights", cache_key, "Flight search is temporarily unavailable. Please try again shortly.")
     except ResponseError as error:
+        if _amadeus_is_failure(error):
+            stale = _stale_results("flights", cache_key)
+            if stale:
+                return stale
         # Amadeus gives detailed message in response / body
         details = None
         try:
@@ -396,10 +599,16 @@ def _search_flights(origin: str, destination: str, departure_date: str, currency
 def _search_hotels(city_code: str, check_in: str, check_out: str, adults: int = 1, currency: str = "USD"):
     """
     Search hotels in a given city using Amadeus API and enrich with Google Places.
+    Results are shared across replicas through the shared cache for SEARCH_CACHE_TTL.
+    Falls back to the last good (stale-marked) results while Amadeus is degraded.
     """
+    cache_key = (city_code, check_in, check_out, adults, currency)
+    cached = cache_get("hotels", cache_key)
+    if cached is not None:
+        return cached
     try:
         # Step 1: Get hotel IDs for the city
-        hotel_list = amadeus.reference_data.locations.hotels.by_city.get(cityCode=city_code)
+        hotel_list = amadeus_call("hotel_list", amadeus.reference_data.locations.hotels.by_city.get, cityCode=city_code)
         if not hotel_list.data:
             return {"error": f"No hotels found in city {city_code}"}
 
@@ -408,13 +617,16 @@ def _search_hotels(city_code: str, check_in: str, check_out: str, adults: int =
             return {"error": f"No valid hotel IDs found in {city_code}"}
 
         # Step 2: Fetch hotel offers
-        response = amadeus.shopping.hotel_offers_search.get(
+        response = amadeus_call(
+            "hotel_offers",
+            amadeus.shopping.hotel_offers_search.get,
             hotelIds=",".join(hotel_ids[:10]),
             checkInDate=check_in,
             checkOutDate=check_out,
             adults=adults,
             currency=currency,
             roomQuantity=1,
+            bestRateOnly="false",  # every offer per hotel, compared by rank_hotels
         )
 
         if not response.data:
@@ -423,16 +635,29 @@ def _search_hotels(city_code: str, check_in: str, check_out: str, adults: int =
         results = []
         for hotel in response.data[:8]:  # take first 8 results
             hotel_info = hotel.get("hotel", {})
-            offer = hotel.get("offers", [{}])[0]
+            offers = [
+                {
+                    "price": offer.get("price", {}).get("total"),
+                    "currency": offer.get("price", {}).get("currency", currency),
+                    "check_in": offer.get("checkInDate"),
+                    "check_out": offer.get("checkOutDate"),
+                    "room": (offer.get("room", {}).get("typeEstimated") or {}).get("category"),
+                    "description": offer.get("room", {}).get("description", {}).get("text"),
+                    "board_type": offer.get("boardType"),
+                }
+                for offer in hotel.get("offers") or [{}]
+            ]
 
             base = {
                 "name": hotel_info.get("name"),
                 "address": hotel_info.get("address", {}).get("lines", ["?"])[0],
                 "category": hotel_info.get("hotelCategory"),
-                "price": offer.get("price", {}).get("total"),
-                "currency": offer.get("price", {}).get("currency", currency),
-                "check_in": offer.get("checkInDate"),
-                "check_out": offer.get("checkOutDate"),
+                # headline price/dates stay on the first offer; all offers are kept for ranking
+                "price": offers[0]["price"],
+                "currency": offers[0]["currency"],
+                "check_in": offers[0]["check_in"],
+                "check_out": offers[0]["check_out"],
+                "offers": offers,
                 "image": (hotel_info.get("media") or [{}])[0].get("uri"),
                 "amenities": hotel_info.get("amenities"),
             }
@@ -440,15 +665,22 @@ def _search_hotels(city_code: str, check_in: str, check_out: str, adults: int =
             # 🔹 Enrich with Google Places details
             g_details = get_google_place_details(hotel_info.get("name"), city_code)
             if g_details:
-                base.update(g_details)  # adds google_rating, google_reviews, google_photo, etc.
-                if g_details.get("google_photo"):
-                    base["image"] = g_details["google_photo"]
+                base.update(g_details)  # adds google_rating, google_reviews, google_photo_ref, etc.
 
             results.append(base)
 
+        # Don't share (or keep as the stale fallback) results missing ratings because Places was down
+        if not any(r.get("places_degraded") for r in results):
+            cache_set("hotels", cache_key, results, SEARCH_CACHE_TTL)
         return results
 
+    except (CircuitOpenError, OSError):
+        return _degraded_results("hotels", cache_key, "Hotel search is temporarily unavailable. Please try again shortly.")
     except ResponseError as error:
+        if _amadeus_is_failure(error):
+            stale = _stale_results("hotels", cache_key)
+            if stale:
+                return stale
         details = None
         try:
             details = error.response.body
@@ -459,9 +691,17 @@ def _search_hotels(city_code: str, check_in: str, check_out: str, adults: int =
 def _search_attractions(city_code: str, limit: int = 5):
     """
     Search attractions using Amadeus API.
+    Cached and degraded the same way as flight and hotel searches.
     """
+    cache_key = (city_code, limit)
+    cached = cache_get("attractions", cache_key)
+    if cached is not None:
+        return cached
     try:
-        response = amadeus.reference_data.locations.points_of_interest.get(
+        response = amadeus_call(
+            "points_of_interest",
+            # amadeus>=9 dropped the points_of_interest helper; call the endpoint directly
+            partial(amadeus.get, "/v1/reference-data/locations/pois"),
             latitude=0,  # Will be overridden by cityCode
             longitude=0,
             radius=50,
@@ -477,8 +717,15 @@ def _search_attractions(city_code: str, limit: int = 5):
                 "geoCode": poi.get("geoCode")
             })
         
+        cache_set("attractions", cache_key, results, SEARCH_CACHE_TTL)
         return results
+    except (CircuitOpenError, OSError):
+        return _degraded_results("attractions", cache_key, "Attraction search is temporarily unavailable. Please try again shortly.")
     except ResponseError as error:
+        if _amadeus_is_failure(error):
+            stale = _stale_results("attractions", cache_key)
+            if stale:
+                return stale
         return {"error": f"Amadeus API error: {error}"}
 
 # === CrewAI Tools ===
@@ -524,19 +771,28 @@ def search_flights(origin_city: str, destination_city: str, departure_date: str,
     return json.dumps(results, indent=2)
 
 @tool
-def search_hotels(city: str, check_in_date: str, check_out_date: str, adults: int = 1, currency: str = "USD") -> str:
+def search_hotels(city: str, check_in_date: str, check_out_date: str, adults: int = 1, currency: str = "USD",
+                  max_price_per_night: float | None = None, min_rating: float | None = None,
+                  amenities: str | None = None, limit: int = 5) -> str:
     """
-    Search for hotels in a city.
+    Search for hotels in a city and return a short list, best match first.
     
     Args:
         city: City name (e.g., 'Mumbai', 'Paris')
         check_in_date: Check-in date in YYYY-MM-DD format
         check_out_date: Check-out date in YYYY-MM-DD format
         adults: Number of adults (default: 1)
-        currency: Currency code (default: USD)
+        currency: Currency code for prices (default: USD)
+        max_price_per_night: Budget per night in `currency` (optional)
+        min_rating: Minimum Google rating from 0 to 5 (optional)
+        amenities: Comma-separated wishes, e.g. 'free wifi, pool, breakfast included'. Recognised:
+            wifi, pool, parking, gym, spa, sauna, jacuzzi, restaurant, bar, room service, breakfast,
+            air conditioning, pets, family/kids, babysitting, airport shuttle, business center,
+            meeting rooms, beach, wheelchair/accessible; others are returned as unchecked_amenities (optional)
+        limit: Maximum number of hotels to return (default: 5)
     
     Returns:
-        JSON string with hotel results or error message
+        JSON string with ranked hotels (price per night, rating, matched amenities) or error message
     """
     # Convert city name to IATA code
     city_iata = get_iata_code(city)
@@ -554,8 +810,31 @@ def search_hotels(city: str, check_in_date: str, check_out_date: str, adults: in
     
     # Search hotels
     results = _search_hotels(city_iata, check_in, check_out, adults, currency)
-    
-    return json.dumps(results, indent=2)
+    if isinstance(results, dict):
+        return json.dumps(results, indent=2)
+
+    # Rank in-process so the LLM gets a few comparable hotels instead of raw offers
+    ranked = rank_hotels(results, currency, max_price_per_night, min_rating, amenities, limit)
+    response = {
+        "hotels_compared": len(results),
+        "currency": currency,
+        "hotels": [compact_hotel(h) for h in ranked],
+    }
+    unrated = [h for h in results if h.get("google_rating") is None]
+    if not ranked:
+        # Were the hotels that pass the other filters only dropped for having no rating?
+        without_rating = rank_hotels(results, currency, max_price_per_night, None, amenities, limit=None)
+        if min_rating is not None and without_rating and all(h.get("google_rating") is None for h in without_rating):
+            response["note"] = ("Google ratings are temporarily unavailable"
+                                if any(h.get("places_degraded") for h in without_rating)
+                                else "Google has no rating for these hotels") + \
+                f", so none could be checked against min_rating {min_rating}. Search again without min_rating."
+        else:
+            response["note"] = "No hotels match these filters. Try a higher budget, lower rating or fewer amenities."
+    elif min_rating is not None and any(h.get("places_degraded") for h in unrated):
+        response["note"] = (f"{len(unrated)} of {len(results)} hotels were left out because Google ratings "
+                            "are temporarily unavailable.")
+    return json.dumps(response, indent=2)
 
 @tool
 def search_attractions(city: str, limit: int = 5) -> str:
@@ -606,6 +885,8 @@ def create_travel_task(user_request: str):
         4. A structured itinerary suggestion
         
         Use the available tools to search for real flight, hotel, and attraction data.
+        When searching hotels, pass the traveller's budget per night, minimum rating and
+        wanted amenities as search_hotels parameters; it returns hotels already ranked.
         Provide specific recommendations with prices, dates, and booking details.
         """,
         expected_output="""A detailed travel plan with:
@@ -626,6 +907,11 @@ def main():
     
     st.title("✈️ AI Travel Agent")
     st.write("Plan your perfect trip with AI-powered travel recommendations!")
+
+    # Let users know when a provider's circuit breaker is tripped
+    degraded = sorted(name for name, state in breaker_states().items() if state != "closed")
+    if degraded:
+        st.warning(f"⚠️ Some travel data sources are degraded ({', '.join(degraded)}). Results may be cached or incomplete.")
     
     # Check API keys
     if not all([
@@ -676,6 +962,9 @@ def main():
         hotel_city = st.text_input("City", placeholder="Paris")
         check_in = st.date_input("Check-in", value=datetime.now() + timedelta(days=7))
         check_out = st.date_input("Check-out", value=datetime.now() + timedelta(days=10))
+        max_price = st.number_input("Max price per night (USD)", min_value=0, value=0, step=25, help="0 = no limit")
+        min_rating = st.slider("Min Google rating", 0.0, 5.0, 0.0, 0.5)
+        hotel_amenities = st.multiselect("Amenities", AMENITY_CHOICES)
         
         if st.button("Search Hotels"):
             if hotel_city:
@@ -692,8 +981,12 @@ def main():
                             if isinstance(results, dict) and "error" in results:
                                 st.error(results["error"])
                             else:
-                                st.success(f"Found {len(results)} hotel options!")
-                                display_hotel_results(results)
+                                ranked = rank_hotels(results, "USD", max_price or None, min_rating or None,
+                                                     hotel_amenities, limit=None)
+                                st.success(f"Found {len(ranked)} of {len(results)} hotel options matching your filters!")
+                                if min_rating and any(h.get("places_degraded") for h in results):
+                                    st.warning("⚠️ Google ratings are temporarily unavailable; unrated hotels are left out by the rating filter.")
+                                display_hotel_results(ranked)
                     except Exception as e:
                         st.error(f"Error searching hotels: {str(e)}")
     
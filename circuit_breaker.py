@@ -0,0 +1,186 @@
+"""
+Circuit breakers for the external providers used by app.py (Amadeus, Google Places).
+
+Kept outside app.py on purpose: Streamlit re-executes the app script on every rerun,
+so anything defined there is recreated per interaction. A normal module is imported
+once per process, so breaker state and the exception classes survive reruns and are
+shared by all sessions in the process. Each replica process keeps its own breakers.
+"""
+import os
+import socket
+import threading
+import time
+
+from collections import deque
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Prometheus textfile-collector output (e.g. node_exporter --collector.textfile.directory).
+# Every replica process writes its own file (METRICS_FILE with the replica id before the
+# extension) and labels its series with replica=, so replicas don't overwrite each other.
+REPLICA_ID = f"{os.getenv('HOSTNAME') or socket.gethostname()}-{os.getpid()}"
+METRICS_FILE = os.getenv("METRICS_FILE")
+if METRICS_FILE:
+    _base, _ext = os.path.splitext(METRICS_FILE)
+    METRICS_FILE = f"{_base}.{REPLICA_ID}{_ext}"
+METRICS_INTERVAL = 5.0
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+
+    def __init__(self, name):
+        super().__init__(f"circuit '{name}' is open")
+        self.name = name
+
+
+class CircuitBreaker:
+    """
+    Rolling-window circuit breaker.
+
+    Calls that raise a failure or take longer than `slow_call_seconds` count as bad.
+    Once at least `min_calls` of the last `window` calls were recorded and the bad share
+    reaches `failure_rate`, the breaker opens and rejects calls for `reset_timeout`
+    seconds. It then lets a single probe through (half-open): success closes it again,
+    failure re-opens it.
+    """
+
+    def __init__(self, name, slow_call_seconds, window=20, min_calls=5, failure_rate=0.5, reset_timeout=30.0):
+        self.name = name
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.opened_at = None
+        self.counts = {"success": 0, "failure": 0, "slow": 0, "rejected": 0}
+        self._outcomes = deque(maxlen=window)  # True = bad call
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return True if a call may go out now (claims the probe slot when half-open)."""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    self.counts["rejected"] += 1
+                    return False
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == HALF_OPEN:
+                if self._probe_in_flight:
+                    self.counts["rejected"] += 1
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def record(self, ok, elapsed):
+        outcome = "failure" if not ok else "slow" if elapsed >= self.slow_call_seconds else "success"
+        with self._lock:
+            self.counts[outcome] += 1
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                if outcome == "success":
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open()
+                return
+            self._outcomes.append(outcome != "success")
+            if (self.state == CLOSED and len(self._outcomes) >= self.min_calls
+                    and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate):
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self._outcomes.clear()
+
+    def call(self, fn, *args, is_failure=None, **kwargs):
+        """
+        Run fn through the breaker. Raises CircuitOpenError without calling fn when open.
+        `is_failure(exc)` can exempt exceptions that don't indicate an unhealthy provider
+        (e.g. a 400 for bad user input); those still propagate but count as successes.
+        """
+        state_before = self.state
+        if not self.allow():
+            export_metrics(force=self.state != state_before)
+            raise CircuitOpenError(self.name)
+        start = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record(is_failure is not None and not is_failure(e), time.monotonic() - start)
+            raise
+        else:
+            self.record(True, time.monotonic() - start)
+        finally:
+            # state transitions are exported immediately, counters at most every METRICS_INTERVAL
+            export_metrics(force=self.state != state_before)
+        return result
+
+
+# === Registry ===
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name, **settings):
+    """Return the process-wide breaker called `name`, creating it with `settings` on first use."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **settings)
+        return _breakers[name]
+
+
+def breaker_states():
+    """name -> state for every breaker created so far."""
+    with _breakers_lock:
+        return {name: b.state for name, b in _breakers.items()}
+
+
+# === Metrics ===
+_last_export = 0.0
+_export_lock = threading.Lock()
+
+
+def metrics_text():
+    """Breaker state and call counters in Prometheus exposition format."""
+    lines = [
+        "# HELP travel_agent_circuit_state Circuit breaker state (0=closed, 1=half_open, 2=open).",
+        "# TYPE travel_agent_circuit_state gauge",
+    ]
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    for b in breakers:
+        lines.append(f'travel_agent_circuit_state{{breaker="{b.name}",replica="{REPLICA_ID}"}} '
+                     f'{STATE_VALUES[b.state]}')
+    lines += [
+        "# HELP travel_agent_circuit_calls_total Calls seen by each circuit breaker, by outcome.",
+        "# TYPE travel_agent_circuit_calls_total counter",
+    ]
+    for b in breakers:
+        for outcome, count in b.counts.items():
+            lines.append(f'travel_agent_circuit_calls_total{{breaker="{b.name}",outcome="{outcome}",'
+                         f'replica="{REPLICA_ID}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+
+def export_metrics(force=False):
+    """Write metrics_text() to METRICS_FILE, at most once every METRICS_INTERVAL seconds."""
+    global _last_export
+    if not METRICS_FILE:
+        return
+    now = time.monotonic()
+    with _export_lock:
+        if not force and now - _last_export < METRICS_INTERVAL:
+            return
+        _last_export = now
+    try:
+        tmp_path = f"{METRICS_FILE}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(metrics_text())
+        os.replace(tmp_path, METRICS_FILE)
+    except OSError:
+        pass
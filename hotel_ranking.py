@@ -0,0 +1,225 @@
+"""
+In-process ranking and filtering of enriched hotel results.
+
+_search_hotels returns every Amadeus offer per hotel plus Google Places data. This
+module turns that into a short, ranked list: prices are normalised to a per-night
+amount in one currency (local rate table, no network), the cheapest acceptable
+offer per hotel is selected, Google ratings are weighted by review count, and
+requested amenities are matched against Amadeus amenity codes, board types and
+room descriptions.
+"""
+import json
+import os
+import re
+
+from datetime import datetime
+
+# Units of each currency per 1 USD. Approximate; override with CURRENCY_RATES_FILE
+# (a JSON object of the same shape) to keep them current without a code change.
+CURRENCY_RATES = {
+    "USD": 1.0, "EUR": 0.92, "GBP": 0.79, "INR": 83.0, "JPY": 150.0, "AED": 3.67,
+    "SGD": 1.35, "THB": 36.0, "AUD": 1.52, "CAD": 1.36, "CHF": 0.88, "HKD": 7.8,
+    "CNY": 7.2, "QAR": 3.64, "KWD": 0.31, "SAR": 3.75, "EGP": 48.0, "ZAR": 18.5,
+    "KES": 130.0, "NGN": 1500.0, "TRY": 32.0, "MXN": 17.0, "BRL": 5.0,
+}
+if os.getenv("CURRENCY_RATES_FILE"):
+    with open(os.getenv("CURRENCY_RATES_FILE")) as f:
+        CURRENCY_RATES.update({k.upper(): float(v) for k, v in json.load(f).items()})
+
+# Free-text amenity -> Amadeus amenity code
+AMENITY_SYNONYMS = {
+    "wifi": "WIFI", "wi-fi": "WIFI", "internet": "WIFI",
+    "pool": "SWIMMING_POOL", "swimming pool": "SWIMMING_POOL",
+    "parking": "PARKING", "gym": "FITNESS_CENTER", "fitness": "FITNESS_CENTER",
+    "spa": "SPA", "sauna": "SAUNA", "jacuzzi": "JACUZZI",
+    "restaurant": "RESTAURANT", "bar": "BAR or LOUNGE", "room service": "ROOM_SERVICE",
+    "breakfast": "BREAKFAST", "air conditioning": "AIR_CONDITIONING", "ac": "AIR_CONDITIONING",
+    "pets": "PETS_ALLOWED", "pet friendly": "PETS_ALLOWED",
+    "kids": "KIDS_WELCOME", "family": "KIDS_WELCOME", "family-friendly": "KIDS_WELCOME",
+    "babysitting": "BABY-SITTING", "airport shuttle": "AIRPORT_SHUTTLE", "shuttle": "AIRPORT_SHUTTLE",
+    "business center": "BUSINESS_CENTER", "meeting rooms": "MEETING_ROOMS", "beach": "BEACH",
+    "accessible": "DISABLED_FACILITIES", "wheelchair": "DISABLED_FACILITIES",
+}
+# Amadeus hotel amenity codes (plus BREAKFAST, derived from board types) accepted as-is in wishes
+AMADEUS_AMENITY_CODES = set(AMENITY_SYNONYMS.values()) | {
+    "NO_KID_ALLOWED", "TENNIS", "GOLF", "KITCHEN", "ANIMAL_WATCHING", "CASINO", "SOLARIUM", "MASSAGE",
+    "VALET_PARKING", "NO_PORN_FILMS", "MINIBAR", "TELEVISION", "WI-FI_IN_ROOM", "GUARDED_PARKG", "SERV_SPEC_MENU",
+}
+# Amadeus board types that include breakfast besides the *BREAKFAST ones
+BREAKFAST_BOARD_TYPES = {"HALF_BOARD", "FULL_BOARD", "ALL_INCLUSIVE", "AMERICAN", "FAMILY_AMERICAN", "MODIFIED",
+                         "BERMUDA"}
+AMENITY_CHOICES = sorted({"wifi", "pool", "parking", "gym", "spa", "restaurant", "breakfast",
+                          "air conditioning", "pets", "family", "airport shuttle", "business center"})
+
+# Score weights; the amenity weight is shared out to the others when no amenities are requested
+SCORE_WEIGHTS = {"rating": 0.45, "price": 0.35, "amenities": 0.2}
+RATING_PRIOR_REVIEWS = 50   # reviews needed before a hotel's own rating outweighs the average
+DEFAULT_PRIOR_RATING = 3.5
+
+
+def convert_currency(amount, from_currency, to_currency):
+    """Convert with the local rate table. Returns None if either currency is unknown."""
+    if amount is None:
+        return None
+    src, dst = (from_currency or "").upper(), (to_currency or "").upper()
+    if src == dst:
+        return float(amount)
+    if src not in CURRENCY_RATES or dst not in CURRENCY_RATES:
+        return None
+    return float(amount) / CURRENCY_RATES[src] * CURRENCY_RATES[dst]
+
+
+def stay_nights(check_in, check_out):
+    try:
+        nights = (datetime.strptime(check_out, "%Y-%m-%d") - datetime.strptime(check_in, "%Y-%m-%d")).days
+    except (TypeError, ValueError):
+        return 1
+    return max(nights, 1)
+
+
+def _matching_codes(text):
+    """Codes of every AMENITY_SYNONYMS term named in text, matched on whole words only."""
+    text = text.lower()
+    # "spa" must not match "spacious", nor "pets" "carpets"
+    return {code for term, code in AMENITY_SYNONYMS.items() if re.search(rf"\b{re.escape(term)}\b", text)}
+
+
+def parse_amenities(amenities):
+    """
+    'free wifi, pool' or ['breakfast included', 'SPA'] -> (ordered Amadeus amenity codes,
+    wishes that name no known amenity). Each wish is searched for known amenity terms;
+    a wish without one is only taken as a code if it is a real Amadeus code.
+    """
+    if not amenities:
+        return [], []
+    items = amenities.split(",") if isinstance(amenities, str) else amenities
+    codes, unrecognised = [], []
+    for item in items:
+        wish = item.strip()
+        if not wish:
+            continue
+        found = sorted(_matching_codes(wish))
+        if not found and wish.upper().replace(" ", "_") in AMADEUS_AMENITY_CODES:
+            found = [wish.upper().replace(" ", "_")]
+        elif not found and wish.upper() in AMADEUS_AMENITY_CODES:  # "BAR or LOUNGE"
+            found = [wish.upper()]
+        if not found:
+            unrecognised.append(wish)
+        codes += [code for code in found if code not in codes]
+    return codes, unrecognised
+
+
+def _offer_amenity_codes(offer):
+    """Amenities an individual offer adds: its board type and anything named in the room description."""
+    codes = _matching_codes(offer.get("description") or "")
+    board = (offer.get("board_type") or "").upper()
+    if "BREAKFAST" in board or board in BREAKFAST_BOARD_TYPES:
+        codes.add("BREAKFAST")
+    return codes
+
+
+def _offers(hotel):
+    # Records from before multi-offer support (e.g. still in the shared cache) only have one price
+    return hotel.get("offers") or [{"price": hotel.get("price"), "currency": hotel.get("currency"),
+                                    "check_in": hotel.get("check_in"), "check_out": hotel.get("check_out")}]
+
+
+def rank_hotels(hotels, currency="USD", max_price_per_night=None, min_rating=None, amenities=None, limit=5):
+    """
+    Filter and rank enriched hotel records.
+
+    Every offer is converted to a per-night price in `currency`; the cheapest offer
+    within `max_price_per_night` is kept per hotel (hotels with none are dropped),
+    preferring offers that include requested amenities such as breakfast.
+    With `min_rating`, hotels without a Google rating are dropped too. Requested
+    `amenities` only affect the score; wishes naming no known amenity are listed as
+    unchecked_amenities rather than missing. Returns up to `limit` copies of the hotel
+    records, best first, with price_per_night, total_price, offers_compared,
+    matched/missing amenities and score added.
+    """
+    wanted, unchecked = parse_amenities(amenities)
+    candidates = []
+    for hotel in hotels or []:
+        priced = []
+        for offer in _offers(hotel):
+            try:
+                total = float(offer.get("price"))
+            except (TypeError, ValueError):
+                continue
+            converted = convert_currency(total, offer.get("currency"), currency)
+            if converted is None:
+                continue
+            nights = stay_nights(offer.get("check_in"), offer.get("check_out"))
+            priced.append((converted / nights, converted, nights, offer))
+        if not priced:
+            continue
+        per_night_prices = [p[0] for p in priced]
+        affordable = [p for p in priced if max_price_per_night is None or p[0] <= max_price_per_night]
+        if not affordable:
+            continue
+        rating = hotel.get("google_rating")
+        if min_rating is not None and (rating is None or rating < min_rating):
+            continue
+        # Multi-offer comparison: the offer covering most requested amenities (e.g. breakfast), then the cheapest
+        hotel_codes = {a.upper() for a in (hotel.get("amenities") or [])}
+        per_night, total, nights, offer = min(
+            affordable, key=lambda p: (-len(set(wanted) & _offer_amenity_codes(p[3])), p[0]))
+        have = hotel_codes | _offer_amenity_codes(offer)
+        candidates.append({
+            **hotel,
+            "price_per_night": round(per_night, 2),
+            "total_price": round(total, 2),
+            "ranking_currency": currency,
+            "nights": nights,
+            "best_offer": {k: offer.get(k) for k in ("room", "description", "board_type") if offer.get(k)},
+            "offers_compared": len(priced),
+            "price_range_per_night": [round(min(per_night_prices), 2), round(max(per_night_prices), 2)],
+            "matched_amenities": [a for a in wanted if a in have],
+            "missing_amenities": [a for a in wanted if a not in have],
+            "unchecked_amenities": unchecked,
+        })
+
+    if not candidates:
+        return []
+
+    # Bayesian average: few reviews pull a rating towards the mean of all hotels found.
+    # Unrated hotels are scored with the prior, capped so they never look better than an average
+    # hotel; that value is not a rating, so they get no weighted_rating.
+    rated = [h["google_rating"] for h in hotels if h.get("google_rating") is not None]
+    prior = sum(rated) / len(rated) if rated else DEFAULT_PRIOR_RATING
+    prices = [h["price_per_night"] for h in candidates]
+    low, high = min(prices), max(prices)
+    weights = dict(SCORE_WEIGHTS)
+    if not wanted:
+        extra = weights.pop("amenities")
+        weights = {k: v + extra * v / sum(weights.values()) for k, v in weights.items()}
+
+    for h in candidates:
+        reviews = h.get("google_reviews") or 0
+        rating = h.get("google_rating")
+        weighted = min(prior, DEFAULT_PRIOR_RATING) if rating is None else (
+            (reviews * rating + RATING_PRIOR_REVIEWS * prior) / (reviews + RATING_PRIOR_REVIEWS))
+        parts = {
+            "rating": weighted / 5,
+            "price": 1.0 if high == low else 1 - (h["price_per_night"] - low) / (high - low),
+        }
+        if wanted:
+            parts["amenities"] = len(h["matched_amenities"]) / len(wanted)
+        if rating is not None:
+            h["weighted_rating"] = round(weighted, 2)
+        h["score"] = round(sum(weights[k] * parts[k] for k in weights), 3)
+
+    candidates.sort(key=lambda h: (-h["score"], h["price_per_night"]))
+    return candidates[:limit] if limit else candidates
+
+
+def compact_hotel(hotel):
+    """The few fields the LLM needs to present a ranked hotel."""
+    fields = ("name", "address", "category", "price_per_night", "total_price", "ranking_currency", "nights",
+              "price_range_per_night", "offers_compared", "best_offer", "google_rating", "google_reviews",
+              "weighted_rating", "matched_amenities", "missing_amenities", "unchecked_amenities",
+              "google_website", "score", "stale", "cached_at")
+    compact = {k: hotel[k] for k in fields if hotel.get(k) not in (None, [], {})}
+    if hotel.get("google_rating") is None:
+        compact["google_rating"] = "unavailable"  # so the rating isn't guessed
+    return compact
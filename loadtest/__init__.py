@@ -0,0 +1 @@
+"""Load-testing harness for the AI Travel Agent (see load-testing.md)."""
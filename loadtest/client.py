@@ -0,0 +1,119 @@
+"""
+Minimal Streamlit websocket client used to simulate browser sessions.
+
+It speaks the same protocol as the Streamlit frontend: connect to /_stcore/stream,
+send BackMsg.rerun_script with widget states, and read ForwardMsg deltas until
+script_finished. Widgets are addressed by their label, so the harness does not
+depend on Streamlit's generated widget ids.
+"""
+import asyncio
+import time
+
+from urllib.parse import urlparse
+
+from tornado.websocket import websocket_connect
+from streamlit.proto.Alert_pb2 import Alert
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+WIDGET_TYPES = ("button", "text_input", "text_area", "date_input")
+
+
+class SessionError(Exception):
+    """The app rendered an error (st.error / exception) or the session broke."""
+
+
+class RunResult:
+    def __init__(self, elapsed, alerts, errors, markdown):
+        self.elapsed = elapsed
+        self.alerts = alerts
+        self.errors = errors
+        self.markdown = markdown
+
+
+class StreamlitSession:
+    def __init__(self, base_url, timeout=300):
+        parsed = urlparse(base_url)
+        scheme = "wss" if parsed.scheme == "https" else "ws"
+        self.ws_url = f"{scheme}://{parsed.netloc}{parsed.path.rstrip('/')}/_stcore/stream"
+        self.timeout = timeout
+        self.conn = None
+        self.widgets = {}  # label -> (widget type, widget id)
+        self.page_script_hash = ""
+
+    async def connect(self):
+        self.conn = await websocket_connect(self.ws_url, subprotocols=["streamlit"],
+                                            max_message_size=200 * 1024 * 1024)
+        # The frontend triggers the first script run itself right after connecting
+        return await self.rerun()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    async def rerun(self, values=None, click=None):
+        """
+        Rerun the script with the given widget values (label -> value) and optionally
+        click the button with label `click`. Returns a RunResult once the run finishes.
+        """
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.page_script_hash = self.page_script_hash
+        for label, value in (values or {}).items():
+            kind, widget_id = self._widget(label)
+            ws = state.widget_states.widgets.add()
+            ws.id = widget_id
+            if kind == "date_input":
+                ws.string_array_value.data.extend([value.strftime("%Y/%m/%d")] if value else [])
+            else:
+                ws.string_value = value
+        if click:
+            kind, widget_id = self._widget(click)
+            ws = state.widget_states.widgets.add()
+            ws.id = widget_id
+            ws.trigger_value = True
+
+        start = time.perf_counter()
+        await self.conn.write_message(msg.SerializeToString(), binary=True)
+        return await self._read_until_finished(start)
+
+    def _widget(self, label):
+        if label not in self.widgets:
+            raise SessionError(f"widget {label!r} not rendered (known: {sorted(self.widgets)})")
+        return self.widgets[label]
+
+    async def _read_until_finished(self, start):
+        alerts, errors, markdown = [], [], []
+        deadline = start + self.timeout
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise SessionError(f"script run did not finish within {self.timeout}s")
+            try:
+                raw = await asyncio.wait_for(self.conn.read_message(), remaining)
+            except asyncio.TimeoutError:
+                raise SessionError(f"script run did not finish within {self.timeout}s") from None
+            if raw is None:
+                raise SessionError("websocket closed by server")
+            fwd = ForwardMsg()
+            fwd.ParseFromString(raw)
+            kind = fwd.WhichOneof("type")
+            if kind == "new_session":
+                self.page_script_hash = fwd.new_session.page_script_hash
+            elif kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                el_type = element.WhichOneof("type")
+                if el_type in WIDGET_TYPES:
+                    widget = getattr(element, el_type)
+                    self.widgets[widget.label] = (el_type, widget.id)
+                elif el_type == "alert":
+                    alerts.append(element.alert.body)
+                    if element.alert.format == Alert.ERROR:
+                        errors.append(element.alert.body)
+                elif el_type == "exception":
+                    errors.append(f"{element.exception.type}: {element.exception.message}")
+                elif el_type == "markdown":
+                    markdown.append(element.markdown.body)
+            elif kind == "script_finished":
+                return RunResult(time.perf_counter() - start, alerts, errors, markdown)
@@ -0,0 +1,387 @@
+"""
+Load generator and saturation report for one ai-travel-agent deployment.
+
+Simulated users open real Streamlit sessions over the websocket (through nginx or
+straight to the container), then loop over the quick-search and "Plan My Trip"
+flows with a think time between interactions. Concurrency is stepped up level by
+level; for each level we record per-flow latency, error rate and throughput, and
+sample the app's CPU/memory (docker stats for a container, /proc for a local pid).
+
+Run the app against loadtest.stubs first (see load-testing.md), then e.g.:
+
+    python -m loadtest.run --url http://localhost --concurrency 1,2,4,8,16 \\
+        --duration 60 --container package-ai-travel-agent-1 --target-users 50
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import statistics
+import subprocess
+import threading
+import time
+
+from datetime import datetime, timedelta
+
+from loadtest.client import StreamlitSession, SessionError
+
+CITIES = ["Paris", "London", "Tokyo", "Dubai", "Singapore", "Rome", "Madrid", "Bangkok"]
+ORIGINS = ["Mumbai", "Delhi", "New York", "Chicago", "Frankfurt", "Sydney"]
+
+
+# === Flows ===
+async def flow_hotels(session):
+    check_in = datetime.now() + timedelta(days=random.randint(7, 60))
+    return await session.rerun({
+        "City": random.choice(CITIES),
+        "Check-in": check_in,
+        "Check-out": check_in + timedelta(days=random.randint(1, 7)),
+    }, click="Search Hotels")
+
+
+async def flow_flights(session):
+    departure = datetime.now() + timedelta(days=random.randint(7, 60))
+    return await session.rerun({
+        "From": random.choice(ORIGINS),
+        "To": random.choice(CITIES),
+        "Departure": departure,
+        "Return (optional)": departure + timedelta(days=random.randint(3, 10)),
+    }, click="Search Flights")
+
+
+async def flow_plan(session):
+    request = (f"I want to travel from {random.choice(ORIGINS)} to {random.choice(CITIES)} "
+               f"for {random.randint(3, 10)} days next month. Mid-range hotels, museums and food.")
+    return await session.rerun({"Describe your travel plans:": request}, click="Plan My Trip")
+
+
+FLOWS = {"hotels": flow_hotels, "flights": flow_flights, "plan": flow_plan}
+
+
+# === Resource sampling ===
+def _parse_docker_size(text):
+    """'123.4MiB' -> MB"""
+    units = {"B": 1 / 1024 ** 2, "KiB": 1 / 1024, "MiB": 1, "GiB": 1024, "kB": 1 / 1000, "MB": 1, "GB": 1000}
+    for unit in sorted(units, key=len, reverse=True):
+        if text.endswith(unit):
+            return float(text[: -len(unit)]) * units[unit]
+    return float(text)
+
+
+class ResourceSampler(threading.Thread):
+    """Poll CPU % and memory (MB) of a docker container or a local process."""
+
+    def __init__(self, container=None, pid=None, interval=2.0):
+        super().__init__(daemon=True)
+        self.container = container
+        self.pid = pid
+        self.interval = interval
+        self.samples = []  # (unix time, cpu %, mem MB)
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=self.interval * 3)
+
+    def _docker_sample(self):
+        out = subprocess.run(
+            ["docker", "stats", "--no-stream", "--format", "{{.CPUPerc}}|{{.MemUsage}}", self.container],
+            capture_output=True, text=True, timeout=30,
+        ).stdout.strip()
+        if not out:
+            return None
+        cpu, mem = out.split("|")
+        return float(cpu.rstrip("%")), _parse_docker_size(mem.split("/")[0].strip())
+
+    def _proc_times(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        # utime, stime, cutime, cstime (fields 14-17 of stat, 0-based 11-14 after the comm)
+        return sum(int(x) for x in fields[11:15]) / os.sysconf("SC_CLK_TCK")
+
+    def _proc_rss(self):
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+        return 0.0
+
+    def run(self):
+        if not (self.container or self.pid):
+            return
+        last = None
+        while not self._stop_event.is_set():
+            now = time.time()
+            try:
+                if self.container:
+                    sample = self._docker_sample()
+                    if sample:
+                        self.samples.append((now, *sample))
+                else:
+                    cpu_time = self._proc_times()
+                    if last is not None:
+                        cpu = 100 * (cpu_time - last[1]) / (now - last[0])
+                        self.samples.append((now, cpu, self._proc_rss()))
+                    last = (now, cpu_time)
+            except (OSError, ValueError, subprocess.SubprocessError):
+                pass
+            self._stop_event.wait(self.interval)
+
+    def window(self, start, end):
+        return [s for s in self.samples if start <= s[0] <= end]
+
+
+# === Load ===
+async def virtual_user(args, url, weights, stop_at, records, start_delay):
+    await asyncio.sleep(start_delay)
+    session = None
+    names, probs = zip(*weights.items())
+    while time.time() < stop_at:
+        if session is None:
+            session = StreamlitSession(url, timeout=args.timeout)
+            t0 = time.time()
+            try:
+                run = await session.connect()
+                records.append({"flow": "connect", "start": t0, "latency": run.elapsed,
+                                "ok": not run.errors, "error": "; ".join(run.errors)[:200]})
+            except (SessionError, OSError) as e:
+                records.append({"flow": "connect", "start": t0, "latency": time.time() - t0,
+                                "ok": False, "error": str(e)[:200]})
+                session.close()
+                session = None
+                await asyncio.sleep(args.think_time)
+                continue
+
+        flow = random.choices(names, probs)[0]
+        t0 = time.time()
+        try:
+            run = await FLOWS[flow](session)
+            records.append({"flow": flow, "start": t0, "latency": run.elapsed,
+                            "ok": not run.errors, "error": "; ".join(run.errors)[:200]})
+        except (SessionError, OSError) as e:
+            records.append({"flow": flow, "start": t0, "latency": time.time() - t0,
+                            "ok": False, "error": str(e)[:200]})
+            session.close()
+            session = None
+        await asyncio.sleep(random.uniform(0.5, 1.5) * args.think_time)
+    if session is not None:
+        session.close()
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = math.floor(k), math.ceil(k)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(records, elapsed):
+    latencies = [r["latency"] for r in records if r["ok"]]
+    errors = [r for r in records if not r["ok"]]
+    return {
+        "requests": len(records),
+        "errors": len(errors),
+        "error_rate": len(errors) / len(records) if records else 0.0,
+        "throughput_rps": len(records) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies) if latencies else None,
+    }
+
+
+async def run_level(args, weights, concurrency, sampler):
+    records = []
+    start = time.time()
+    stop_at = start + args.ramp_up + args.duration
+    # Several URLs (e.g. individual replicas) are assigned round-robin; each user sticks to one
+    urls = args.url.split(",")
+    users = [virtual_user(args, urls[i % len(urls)], weights, stop_at, records, args.ramp_up * i / concurrency)
+             for i in range(concurrency)]
+    await asyncio.gather(*users)
+    end = time.time()
+
+    # Only count interactions that started after ramp-up, once every user is active
+    steady = [r for r in records if r["start"] >= start + args.ramp_up]
+    steady_elapsed = end - (start + args.ramp_up)
+    interactions = [r for r in steady if r["flow"] != "connect"]
+    samples = sampler.window(start + args.ramp_up, end)
+    error_counts = {}
+    for r in steady:
+        if not r["ok"]:
+            error_counts[r["error"]] = error_counts.get(r["error"], 0) + 1
+    return {
+        "concurrency": concurrency,
+        "overall": summarize(interactions, steady_elapsed),
+        # Sessions mostly connect during ramp-up, so connect latency uses every record
+        "flows": {
+            "connect": summarize([r for r in records if r["flow"] == "connect"], end - start),
+            **{flow: summarize([r for r in steady if r["flow"] == flow], steady_elapsed)
+               for flow in FLOWS if any(r["flow"] == flow for r in steady)},
+        },
+        "cpu_avg": statistics.fmean(s[1] for s in samples) if samples else None,
+        "cpu_max": max(s[1] for s in samples) if samples else None,
+        "mem_max_mb": max(s[2] for s in samples) if samples else None,
+        "top_errors": sorted(error_counts.items(), key=lambda kv: -kv[1])[:5],
+        "samples": [{"t": round(s[0] - start, 1), "cpu": s[1], "mem_mb": s[2]} for s in samples],
+    }
+
+
+# === Report ===
+def throughput_knee(levels):
+    """First level where adding users no longer adds meaningful throughput (its user count), or None."""
+    for prev, cur in zip(levels, levels[1:]):
+        users_gain = cur["concurrency"] / prev["concurrency"] - 1
+        rps_prev = prev["overall"]["throughput_rps"]
+        rps_gain = cur["overall"]["throughput_rps"] / rps_prev - 1 if rps_prev else 0
+        if users_gain > 0 and rps_gain < 0.25 * users_gain:
+            return prev["concurrency"]
+    return None
+
+
+def analyze(levels, args):
+    """Find the highest concurrency that meets the SLO and derive a replica count."""
+    passing = [lv for lv in levels
+               if lv["overall"]["requests"]
+               and lv["overall"]["error_rate"] <= args.max_error_rate
+               and lv["overall"]["p95"] is not None and lv["overall"]["p95"] <= args.slo_p95]
+    sustainable = max((lv["concurrency"] for lv in passing), default=0)
+    peak = max(levels, key=lambda lv: lv["overall"]["throughput_rps"]) if levels else None
+
+    knee = throughput_knee(levels)
+
+    replicas = math.ceil(args.target_users * (1 + args.headroom) / sustainable) if sustainable else None
+    return {
+        "sustainable_users_per_replica": sustainable,
+        "all_levels_passed": bool(levels) and len(passing) == len(levels),
+        "throughput_knee_users": knee,
+        "peak_throughput_rps": peak["overall"]["throughput_rps"] if peak else None,
+        "peak_throughput_users": peak["concurrency"] if peak else None,
+        "target_users": args.target_users,
+        "headroom": args.headroom,
+        "recommended_replicas": replicas,
+    }
+
+
+def _fmt(value, spec=".2f", unit=""):
+    return "n/a" if value is None else f"{value:{spec}}{unit}"
+
+
+def render_report(levels, verdict, args):
+    lines = [
+        "# Saturation report",
+        "",
+        f"- Target: `{args.url}`, {args.duration}s steady state per level after {args.ramp_up}s ramp-up",
+        f"- Flow mix: `{args.mix}`, think time ~{args.think_time}s",
+        f"- SLO: p95 <= {args.slo_p95}s and error rate <= {args.max_error_rate:.1%}",
+        "",
+        "| Users | Req | Req/s | Errors | p50 (s) | p95 (s) | p99 (s) | CPU avg % | CPU max % | Mem max MB |",
+        "|---|---|---|---|---|---|---|---|---|---|",
+    ]
+    for lv in levels:
+        o = lv["overall"]
+        lines.append(
+            f"| {lv['concurrency']} | {o['requests']} | {o['throughput_rps']:.2f} | {o['error_rate']:.1%} "
+            f"| {_fmt(o['p50'])} | {_fmt(o['p95'])} | {_fmt(o['p99'])} "
+            f"| {_fmt(lv['cpu_avg'], '.0f')} | {_fmt(lv['cpu_max'], '.0f')} | {_fmt(lv['mem_max_mb'], '.0f')} |"
+        )
+    lines += ["", "## Per-flow p95 latency (s)", "",
+              "| Users | " + " | ".join(["connect", *FLOWS]) + " |",
+              "|---|" + "---|" * (len(FLOWS) + 1)]
+    for lv in levels:
+        cells = [_fmt(lv["flows"].get(f, {}).get("p95")) for f in ["connect", *FLOWS]]
+        lines.append(f"| {lv['concurrency']} | " + " | ".join(cells) + " |")
+
+    lines += ["", "## Sizing", ""]
+    sustainable = verdict["sustainable_users_per_replica"]
+    if not sustainable:
+        lines.append("- No tested level met the SLO; a single replica is already saturated at the lowest "
+                     "concurrency. Fix per-request latency before scaling out.")
+    else:
+        qualifier = "at least " if verdict["all_levels_passed"] else ""
+        lines.append(f"- One replica sustains {qualifier}**{sustainable}** concurrent users within the SLO.")
+        if verdict["all_levels_passed"]:
+            lines.append("- Every level passed; rerun with higher `--concurrency` to find the real limit.")
+        lines.append(f"- For {verdict['target_users']} concurrent users with {verdict['headroom']:.0%} headroom: "
+                     f"**{verdict['recommended_replicas']} replica(s)**.")
+    if verdict["throughput_knee_users"]:
+        lines.append(f"- Throughput stops scaling above ~{verdict['throughput_knee_users']} users "
+                     f"(peak {verdict['peak_throughput_rps']:.2f} req/s at {verdict['peak_throughput_users']} users).")
+
+    errors = [(lv["concurrency"], msg, n) for lv in levels for msg, n in lv["top_errors"]]
+    if errors:
+        lines += ["", "## Top errors", ""]
+        lines += [f"- {users} users, {n}x: `{msg}`" for users, msg, n in errors]
+    return "\n".join(lines) + "\n"
+
+
+def parse_mix(text):
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in FLOWS:
+            raise argparse.ArgumentTypeError(f"unknown flow {name!r}; choose from {', '.join(FLOWS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Step-load the Streamlit app and report where it saturates")
+    parser.add_argument("--url", default="http://localhost:5000",
+                        help="app or nginx base URL; comma-separate several to spread users across replicas")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="comma-separated user counts, one level each")
+    parser.add_argument("--duration", type=float, default=60, help="steady-state seconds per level")
+    parser.add_argument("--ramp-up", type=float, default=10, help="seconds over which users join a level")
+    parser.add_argument("--think-time", type=float, default=2.0, help="mean pause between interactions")
+    parser.add_argument("--mix", default="hotels=4,flights=4,plan=2", help="flow weights, e.g. hotels=1,plan=1")
+    parser.add_argument("--timeout", type=float, default=300, help="per-interaction timeout in seconds")
+    parser.add_argument("--slo-p95", type=float, default=10.0, help="p95 latency budget in seconds")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--target-users", type=int, default=50, help="expected peak concurrent users")
+    parser.add_argument("--headroom", type=float, default=0.3, help="extra capacity fraction for sizing")
+    parser.add_argument("--container", help="docker container to sample with `docker stats`")
+    parser.add_argument("--pid", type=int, help="local app process to sample via /proc")
+    parser.add_argument("--sample-interval", type=float, default=2.0)
+    parser.add_argument("--out", default="loadtest-results", help="directory for results.json and report.md")
+    return parser
+
+
+async def run(args):
+    weights = parse_mix(args.mix)
+    levels_to_run = [int(c) for c in args.concurrency.split(",")]
+    sampler = ResourceSampler(container=args.container, pid=args.pid, interval=args.sample_interval)
+    sampler.start()
+    levels = []
+    try:
+        for concurrency in levels_to_run:
+            print(f"-> {concurrency} users ...", flush=True)
+            level = await run_level(args, weights, concurrency, sampler)
+            o = level["overall"]
+            print(f"   {o['requests']} req, {o['throughput_rps']:.2f} req/s, errors {o['error_rate']:.1%}, "
+                  f"p95 {_fmt(o['p95'])}s, cpu {_fmt(level['cpu_avg'], '.0f')}%", flush=True)
+            levels.append(level)
+    finally:
+        sampler.stop()
+
+    verdict = analyze(levels, args)
+    os.makedirs(args.out, exist_ok=True)
+    with open(os.path.join(args.out, "results.json"), "w") as f:
+        json.dump({"args": vars(args), "levels": levels, "verdict": verdict}, f, indent=2)
+    report = render_report(levels, verdict, args)
+    with open(os.path.join(args.out, "report.md"), "w") as f:
+        f.write(report)
+    print(report)
+
+
+def main():
+    asyncio.run(run(build_parser().parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Replica scaling benchmark.
+
+Starts the stub upstreams, then for each replica count N launches N Streamlit
+processes of app.py sharing one shared-cache database, and drives N x users-per-
+replica simulated users spread over the replicas (each user sticks to one replica,
+as with nginx session affinity).
+
+Each user waits for its previous interaction, so if a single replica is not
+saturated at the per-replica load, throughput grows linearly with N whatever the
+app does. The per-replica load is therefore the saturation point of one replica:
+by default a single-replica step run (--steps) finds where its throughput stops
+growing; a --users-per-replica below that point is rejected. The report shows
+speedup and efficiency relative to one replica, plus CPU per replica process so a
+replica that is (or isn't) saturated is visible.
+
+    python -m loadtest.scaling --replicas 1,2,4 --steps 2,4,8,16,32 --duration 60
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from loadtest import stubs
+from loadtest.client import StreamlitSession
+from loadtest.run import ResourceSampler, parse_mix, run_level, throughput_knee, _fmt
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_stubs(port, latency_args):
+    config = stubs.build_parser().parse_args(["--host", "127.0.0.1", "--port", str(port), *latency_args])
+    server = stubs.serve(config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def replica_env(stub_port, cache_path, photo_dir):
+    env = dict(os.environ)
+    env.update({
+        "GROQ_API_KEY": "stub",
+        "AMADEUS_CLIENT_ID": "stub",
+        "AMADEUS_CLIENT_SECRET": "stub",
+        "GOOGLE_PLACES_API_KEY": "stub",
+        "AMADEUS_HOST": "127.0.0.1",
+        "AMADEUS_PORT": str(stub_port),
+        "AMADEUS_SSL": "false",
+        "GOOGLE_PLACES_BASE_URL": f"http://127.0.0.1:{stub_port}/maps/api/place",
+        "GROQ_BASE_URL": f"http://127.0.0.1:{stub_port}/openai/v1",
+        "SHARED_CACHE_PATH": cache_path,
+        "PHOTO_CACHE_DIR": photo_dir,
+        "OTEL_SDK_DISABLED": "true",
+    })
+    return env
+
+
+def wait_healthy(port, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=2) as resp:
+                if resp.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"replica on port {port} did not become healthy within {timeout}s")
+
+
+def start_replicas(count, base_port, env, log_dir):
+    procs = []
+    for i in range(count):
+        port = base_port + i
+        log = open(os.path.join(log_dir, f"replica-{port}.log"), "w")
+        procs.append(subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", "app.py", "--server.port", str(port),
+             "--server.headless", "true", "--browser.gatherUsageStats", "false"],
+            cwd=REPO_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+        ))
+    for i in range(count):
+        wait_healthy(base_port + i)
+    return procs
+
+
+async def warm_up(urls):
+    """Run the script once per replica so the first-run imports (crewai, litellm) aren't measured."""
+    for url in urls:
+        session = StreamlitSession(url)
+        try:
+            await session.connect()
+        finally:
+            session.close()
+
+
+def stop_replicas(procs):
+    for proc in procs:
+        proc.terminate()
+    for proc in procs:
+        try:
+            proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def _level_args(args, urls, duration):
+    level_args = argparse.Namespace(**vars(args))
+    level_args.url = ",".join(urls)
+    level_args.duration = duration
+    return level_args
+
+
+async def find_saturation(args, weights, env, workdir):
+    """
+    Step-load a single replica. Returns (users at which it is saturated, levels), the
+    users being None when throughput was still growing at the last step.
+    """
+    procs = start_replicas(1, args.base_port, env, workdir)
+    levels = []
+    try:
+        url = f"http://127.0.0.1:{args.base_port}"
+        await warm_up([url])
+        for users in [int(n) for n in args.steps.split(",")]:
+            print(f"-> saturation step: 1 replica, {users} users ...", flush=True)
+            level = await run_level(_level_args(args, [url], args.step_duration), weights, users, ResourceSampler())
+            print(f"   {level['overall']['throughput_rps']:.2f} req/s", flush=True)
+            levels.append(level)
+    finally:
+        stop_replicas(procs)
+    if throughput_knee(levels) is None:
+        return None, levels
+    peak = max(levels, key=lambda lv: lv["overall"]["throughput_rps"])
+    return max(throughput_knee(levels), peak["concurrency"]), levels
+
+
+def render_report(rows, args, saturation_levels):
+    lines = [
+        "# Replica scaling benchmark",
+        "",
+        f"- {args.users_per_replica} users per replica (single replica saturates at {args.saturation_users}), "
+        f"{args.duration}s steady state, mix `{args.mix}`, think time ~{args.think_time}s",
+        f"- CPU cores available: {os.cpu_count()}",
+    ]
+    if saturation_levels:
+        steps = ", ".join(f"{lv['concurrency']} users: {lv['overall']['throughput_rps']:.2f} req/s"
+                          for lv in saturation_levels)
+        lines.append(f"- Single-replica step run: {steps}")
+    lines += [
+        "",
+        "| Replicas | Users | Req/s | Speedup | Efficiency | p95 (s) | Errors | CPU % per replica |",
+        "|---|---|---|---|---|---|---|---|",
+    ]
+    for row in rows:
+        cpu = " / ".join(_fmt(c, ".0f") for c in row["replica_cpu"])
+        lines.append(f"| {row['replicas']} | {row['users']} | {row['throughput_rps']:.2f} | {row['speedup']:.2f}x "
+                     f"| {row['efficiency']:.0%} | {_fmt(row['p95'])} | {row['error_rate']:.1%} | {cpu} |")
+    lines += ["", "Speedup only measures scaling when every replica is saturated: per-replica CPU should stay "
+                  "close to the single-replica row. Replicas well below it were not the bottleneck."]
+    if any(row["replicas"] > (os.cpu_count() or 1) for row in rows):
+        lines += ["", "Replica counts above the number of CPU cores compete for CPU; expect efficiency "
+                      "to drop there. Run on a host with at least as many cores as replicas."]
+    return "\n".join(lines) + "\n"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Measure throughput scaling across app replicas")
+    parser.add_argument("--replicas", default="1,2,4", help="comma-separated replica counts")
+    parser.add_argument("--users-per-replica", type=int,
+                        help="load per replica; must be at or above the single-replica saturation point "
+                             "(default: the saturation point found by the --steps run)")
+    parser.add_argument("--saturation-users", type=int,
+                        help="saturation point from an earlier `loadtest.run` report (its throughput knee or "
+                             "peak); skips the single-replica step run")
+    parser.add_argument("--steps", default="2,4,8,16,32", help="user counts for the single-replica step run")
+    parser.add_argument("--step-duration", type=float, default=30, help="steady-state seconds per step")
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--ramp-up", type=float, default=10)
+    parser.add_argument("--think-time", type=float, default=1.0)
+    parser.add_argument("--mix", default="hotels=4,flights=4,plan=2")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--sample-interval", type=float, default=2.0)
+    parser.add_argument("--base-port", type=int, default=8600)
+    parser.add_argument("--stub-port", type=int, default=8090)
+    parser.add_argument("--stub-args", default="", help="extra loadtest.stubs flags, e.g. '--llm-latency-ms 500'")
+    parser.add_argument("--out", default="loadtest-results")
+    return parser
+
+
+async def run(args):
+    weights = parse_mix(args.mix)
+    server = start_stubs(args.stub_port, args.stub_args.split())
+    workdir = tempfile.mkdtemp(prefix="travel-agent-scaling-")
+    photo_dir = os.path.join(workdir, "photos")
+    rows = []
+    saturation_levels = []
+    try:
+        saturation = args.saturation_users
+        if saturation is None:
+            env = replica_env(args.stub_port, os.path.join(workdir, "cache-steps.db"), photo_dir)
+            saturation, saturation_levels = await find_saturation(args, weights, env, workdir)
+            if saturation is None:
+                sys.exit(f"One replica was not saturated at {args.steps.split(',')[-1]} users; "
+                         "rerun with higher --steps (or less --think-time).")
+            args.saturation_users = saturation
+        if args.users_per_replica is None:
+            args.users_per_replica = saturation
+        elif args.users_per_replica < saturation:
+            sys.exit(f"--users-per-replica {args.users_per_replica} is below the single-replica saturation point "
+                     f"({saturation} users); throughput would grow with replicas regardless of the app.")
+
+        for replicas in [int(n) for n in args.replicas.split(",")]:
+            # Fresh cache per run so every replica count starts equally cold
+            env = replica_env(args.stub_port, os.path.join(workdir, f"cache-{replicas}.db"), photo_dir)
+            print(f"-> {replicas} replica(s), {replicas * args.users_per_replica} users ...", flush=True)
+            procs = start_replicas(replicas, args.base_port, env, workdir)
+            samplers = [ResourceSampler(pid=proc.pid, interval=args.sample_interval) for proc in procs]
+            try:
+                urls = [f"http://127.0.0.1:{args.base_port + i}" for i in range(replicas)]
+                await warm_up(urls)
+                for sampler in samplers:
+                    sampler.start()
+                started = time.time()
+                level = await run_level(_level_args(args, urls, args.duration), weights,
+                                        replicas * args.users_per_replica, samplers[0])
+                steady = (started + args.ramp_up, time.time())
+            finally:
+                for sampler in samplers:
+                    sampler.stop()
+                stop_replicas(procs)
+            replica_cpu = []
+            for sampler in samplers:
+                samples = sampler.window(*steady)
+                replica_cpu.append(sum(s[1] for s in samples) / len(samples) if samples else None)
+            o = level["overall"]
+            rows.append({"replicas": replicas, "users": level["concurrency"],
+                         "throughput_rps": o["throughput_rps"], "p95": o["p95"], "error_rate": o["error_rate"],
+                         "replica_cpu": replica_cpu, "flows": level["flows"]})
+            print(f"   {o['throughput_rps']:.2f} req/s, p95 {_fmt(o['p95'])}s, errors {o['error_rate']:.1%}, "
+                  f"cpu/replica {' / '.join(_fmt(c, '.0f') for c in replica_cpu)}%", flush=True)
+    finally:
+        server.shutdown()
+
+    base = next((r["throughput_rps"] for r in rows if r["replicas"] == 1), None) \
+        or (rows[0]["throughput_rps"] / rows[0]["replicas"] if rows else 0)
+    for row in rows:
+        row["speedup"] = row["throughput_rps"] / base if base else 0.0
+        row["efficiency"] = row["speedup"] / row["replicas"]
+
+    os.makedirs(args.out, exist_ok=True)
+    with open(os.path.join(args.out, "scaling.json"), "w") as f:
+        json.dump({"args": vars(args), "rows": rows, "cpu_count": os.cpu_count(),
+                   "saturation_steps": [{"users": lv["concurrency"], "overall": lv["overall"]}
+                                        for lv in saturation_levels]}, f, indent=2)
+    report = render_report(rows, args, saturation_levels)
+    with open(os.path.join(args.out, "scaling.md"), "w") as f:
+        f.write(report)
+    print(report)
+    print(f"Replica logs: {workdir}")
+
+
+def main():
+    asyncio.run(run(build_parser().parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Stub upstream servers for load testing.
+
+A single HTTP server answers the endpoints app.py uses on Amadeus, Google Places
+and the Groq OpenAI-compatible API, with configurable latency and error rate, so
+the app can be saturated without spending real API quota. Point the app at it with:
+
+    AMADEUS_HOST=127.0.0.1 AMADEUS_PORT=8090 AMADEUS_SSL=false
+    GOOGLE_PLACES_BASE_URL=http://127.0.0.1:8090/maps/api/place
+    GROQ_BASE_URL=http://127.0.0.1:8090/openai/v1
+
+Run with: python -m loadtest.stubs --port 8090
+"""
+import argparse
+import json
+import random
+import re
+import struct
+import time
+import zlib
+
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def _solid_png(width=200, height=150, rgb=(200, 160, 90)):
+    """Build a small solid-colour PNG so photo requests return a real image."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    row = b"\x00" + bytes(rgb) * width
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(row * height))
+            + chunk(b"IEND", b""))
+
+
+STUB_PHOTO = _solid_png()
+HOTELS_PER_CITY = 10
+
+
+def _amadeus_hotel_offers(hotel_ids, check_in, check_out, currency):
+    data = []
+    for i, hotel_id in enumerate(hotel_ids):
+        data.append({
+            "type": "hotel-offers",
+            "hotel": {
+                "hotelId": hotel_id,
+                "name": f"Stub Hotel {i + 1}",
+                "hotelCategory": str(2 + i % 4),
+                "address": {"lines": [f"{i + 1} Stub Street"]},
+                "amenities": ["WIFI", "PARKING", "SWIMMING_POOL", "RESTAURANT"][: 1 + i % 4],
+            },
+            "offers": [{
+                "id": f"OFFER{i}{j}",
+                "checkInDate": check_in,
+                "checkOutDate": check_out,
+                "room": {"typeEstimated": {"category": ["STANDARD_ROOM", "SUPERIOR_ROOM"][j]}},
+                "boardType": ["ROOM_ONLY", "BREAKFAST"][j],
+                "price": {"currency": currency, "total": f"{120 + 35 * i + 40 * j:.2f}"},
+            } for j in range(2)],
+        })
+    return {"data": data}
+
+
+def _amadeus_flight_offers(origin, destination, departure_date, return_date, currency):
+    data = []
+    dep = datetime.strptime(departure_date, "%Y-%m-%d")
+    for i in range(8):
+        out_at = dep + timedelta(hours=6 + i)
+        itineraries = [{
+            "duration": f"PT{5 + i % 3}H{10 * i % 60}M",
+            "segments": [{
+                "departure": {"iataCode": origin, "at": out_at.strftime("%Y-%m-%dT%H:%M:%S")},
+                "arrival": {"iataCode": destination,
+                            "at": (out_at + timedelta(hours=5 + i % 3)).strftime("%Y-%m-%dT%H:%M:%S")},
+            }],
+        }]
+        if return_date:
+            ret_at = datetime.strptime(return_date, "%Y-%m-%d") + timedelta(hours=9 + i)
+            itineraries.append({
+                "duration": "PT6H",
+                "segments": [{
+                    "departure": {"iataCode": destination, "at": ret_at.strftime("%Y-%m-%dT%H:%M:%S")},
+                    "arrival": {"iataCode": origin,
+                                "at": (ret_at + timedelta(hours=6)).strftime("%Y-%m-%dT%H:%M:%S")},
+                }],
+            })
+        data.append({
+            "validatingAirlineCodes": [["AF", "BA", "LH", "EK"][i % 4]],
+            "price": {"total": f"{350 + 45 * i:.2f}", "currency": currency},
+            "itineraries": itineraries,
+        })
+    return {"data": data}
+
+
+def _llm_reply(messages):
+    """
+    Emulate a ReAct-style agent: call search_flights, then search_hotels, then answer.
+    The number of earlier assistant turns (each carrying one tool observation) decides the step.
+    """
+    observations = sum(1 for m in messages if m.get("role") == "assistant")
+    if observations == 0:
+        return ('Thought: I should look up flights first.\n'
+                'Action: search_flights\n'
+                'Action Input: {"origin_city": "Mumbai", "destination_city": "Paris", '
+                '"departure_date": "2030-12-15", "return_date": "2030-12-22"}')
+    if observations == 1:
+        return ('Thought: Now I need hotels.\n'
+                'Action: search_hotels\n'
+                'Action Input: {"city": "Paris", "check_in_date": "2030-12-15", "check_out_date": "2030-12-22"}')
+    return ("Thought: I now know the final answer\n"
+            "Final Answer: ## Stub travel plan\n"
+            "- Flight: AF, USD 350.00\n- Hotel: Stub Hotel 1, USD 120.00\n- Day 1-7: sightseeing")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = None  # argparse namespace, set by serve()
+
+    def log_message(self, format, *args):
+        if self.config.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type="application/json"):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _simulate(self, provider):
+        """Sleep for the provider's latency; return True if this call should fail."""
+        latency_ms = getattr(self.config, f"{provider}_latency_ms")
+        if latency_ms:
+            time.sleep(latency_ms / 1000 * random.uniform(0.5, 1.5))
+        return random.random() < getattr(self.config, f"{provider}_error_rate")
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        path = url.path
+
+        if path.startswith("/maps/api/place/"):
+            if self._simulate("google"):
+                return self._send(500, {"status": "UNKNOWN_ERROR"})
+            if path.endswith("/textsearch/json"):
+                ref = re.sub(r"\W+", "-", q.get("query", "place")).lower()
+                return self._send(200, {"status": "OK", "results": [{"place_id": ref}]})
+            if path.endswith("/details/json"):
+                place_id = q.get("place_id", "place")
+                return self._send(200, {"status": "OK", "result": {
+                    "name": place_id,
+                    "rating": round(3.5 + (sum(map(ord, place_id)) % 15) / 10, 1),
+                    "user_ratings_total": 50 + sum(map(ord, place_id)) % 2000,
+                    "formatted_address": f"{place_id}, Stub City",
+                    "website": "https://example.com/",
+                    "photos": [{"photo_reference": f"photo-{place_id}"}],
+                }})
+            if path.endswith("/photo"):
+                return self._send(200, STUB_PHOTO, content_type="image/png")
+            return self._send(404, {"status": "NOT_FOUND"})
+
+        if self._simulate("amadeus"):
+            return self._send(500, {"errors": [{"status": 500, "title": "STUB ERROR"}]},
+                              content_type="application/vnd.amadeus+json")
+        amadeus_json = "application/vnd.amadeus+json"
+        if path == "/v1/reference-data/locations":
+            keyword = q.get("keyword", "XXX")
+            return self._send(200, {"data": [{"iataCode": keyword[:3].upper()}]}, amadeus_json)
+        if path == "/v1/reference-data/locations/hotels/by-city":
+            city = q.get("cityCode", "XXX")
+            return self._send(200, {"data": [{"hotelId": f"{city}{i:05d}"} for i in range(HOTELS_PER_CITY)]},
+                              amadeus_json)
+        if path == "/v3/shopping/hotel-offers":
+            body = _amadeus_hotel_offers(q.get("hotelIds", "").split(","), q.get("checkInDate"),
+                                         q.get("checkOutDate"), q.get("currency", "USD"))
+            return self._send(200, body, amadeus_json)
+        if path == "/v2/shopping/flight-offers":
+            body = _amadeus_flight_offers(q.get("originLocationCode"), q.get("destinationLocationCode"),
+                                          q.get("departureDate"), q.get("returnDate"), q.get("currencyCode", "USD"))
+            return self._send(200, body, amadeus_json)
+        return self._send(404, {"errors": [{"status": 404, "title": "NOT FOUND"}]}, amadeus_json)
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        body = self._read_body()
+
+        if path == "/v1/security/oauth2/token":
+            return self._send(200, {"type": "amadeusOAuth2Token", "access_token": "stub-token",
+                                    "expires_in": 1799, "token_type": "Bearer"})
+
+        if path.endswith("/chat/completions"):
+            if self._simulate("llm"):
+                return self._send(500, {"error": {"message": "stub LLM failure", "type": "server_error"}})
+            req = json.loads(body or b"{}")
+            content = _llm_reply(req.get("messages", []))
+            return self._send(200, {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": req.get("model", "stub"),
+                "service_tier": "on_demand",  # always present on Groq responses; litellm reads it
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": len(body) // 4, "completion_tokens": len(content) // 4,
+                          "total_tokens": (len(body) + len(content)) // 4},
+            })
+
+        return self._send(404, {"error": "not found"})
+
+
+def serve(config):
+    StubHandler.config = config
+    server = ThreadingHTTPServer((config.host, config.port), StubHandler)
+    server.daemon_threads = True
+    return server
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Stub Amadeus / Google Places / Groq endpoints for load tests")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--amadeus-latency-ms", type=float, default=400)
+    parser.add_argument("--google-latency-ms", type=float, default=150)
+    parser.add_argument("--llm-latency-ms", type=float, default=900)
+    parser.add_argument("--amadeus-error-rate", type=float, default=0.0)
+    parser.add_argument("--google-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    return parser
+
+
+def main():
+    config = build_parser().parse_args()
+    server = serve(config)
+    print(f"Stub upstreams listening on http://{config.host}:{config.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
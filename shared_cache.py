@@ -0,0 +1,140 @@
+"""
+Cache shared by every app process on a host.
+
+With several Streamlit replicas (see docker-compose.yml / nginx.conf) per-process
+caches would each have to warm up separately and would disagree with each other.
+The default backend is a SQLite database in WAL mode, which lets many processes read
+concurrently while one writes; point SHARED_CACHE_PATH at a volume shared by all
+replicas. SHARED_CACHE_BACKEND=memory keeps a per-process dict instead (single
+process / development).
+
+Values are JSON-serialisable; keys may be any JSON-serialisable value (tuples are
+fine). Entries have a TTL for normal reads, but are kept for STALE_RETENTION seconds
+after expiry so callers can still fall back to them when a provider is down.
+"""
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+
+SHARED_CACHE_BACKEND = os.getenv("SHARED_CACHE_BACKEND", "sqlite")
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", os.path.join(".cache", "shared_cache.db"))
+STALE_RETENTION = float(os.getenv("SHARED_CACHE_STALE_RETENTION", str(24 * 3600)))
+PRUNE_PROBABILITY = 0.01  # share of writes that also delete long-expired rows
+
+
+def _encode_key(key):
+    return key if isinstance(key, str) else json.dumps(key, separators=(",", ":"), default=str)
+
+
+class SQLiteCache:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL, expires_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key)) WITHOUT ROWID"
+        )
+
+    def _conn(self):
+        # sqlite3 connections must not be shared between threads; Streamlit runs each session in its own
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def get_entry(self, namespace, key):
+        row = self._conn().execute(
+            "SELECT value, stored_at, expires_at FROM cache WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+
+    def set_entry(self, namespace, key, value, ttl):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, stored_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+            (namespace, key, json.dumps(value), now, now + ttl),
+        )
+        if random.random() < PRUNE_PROBABILITY:
+            conn.execute("DELETE FROM cache WHERE expires_at < ?", (now - STALE_RETENTION,))
+
+
+class MemoryCache:
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_entry(self, namespace, key):
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+        if entry is None:
+            return None
+        return json.loads(entry[0]), entry[1], entry[2]
+
+    def set_entry(self, namespace, key, value, ttl):
+        now = time.time()
+        with self._lock:
+            self._entries[(namespace, key)] = (json.dumps(value), now, now + ttl)
+            if random.random() < PRUNE_PROBABILITY:
+                cutoff = now - STALE_RETENTION
+                for k in [k for k, e in self._entries.items() if e[2] < cutoff]:
+                    del self._entries[k]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = MemoryCache() if SHARED_CACHE_BACKEND == "memory" else SQLiteCache(SHARED_CACHE_PATH)
+    return _backend
+
+
+def cache_get(namespace, key):
+    """Return the cached value if present and not expired, else None."""
+    try:
+        entry = _get_backend().get_entry(namespace, _encode_key(key))
+    except sqlite3.Error:
+        return None
+    if entry is None or entry[2] < time.time():
+        return None
+    return entry[0]
+
+
+def cache_get_stale(namespace, key):
+    """Return (value, stored_at) even if expired (within STALE_RETENTION), else None."""
+    try:
+        entry = _get_backend().get_entry(namespace, _encode_key(key))
+    except sqlite3.Error:
+        return None
+    if entry is None or entry[2] < time.time() - STALE_RETENTION:
+        return None
+    return entry[0], entry[1]
+
+
+def cache_set(namespace, key, value, ttl):
+    """Store value for ttl seconds. Cache write failures never break the caller."""
+    try:
+        _get_backend().set_entry(namespace, _encode_key(key), value, ttl)
+    except sqlite3.Error:
+        pass
@@ -0,0 +1,116 @@
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+def fail():
+    raise OSError("down")
+
+
+def make_breaker(**settings):
+    return CircuitBreaker("test", **{"slow_call_seconds": 10.0, "window": 4, "min_calls": 4,
+                                     "failure_rate": 0.5, "reset_timeout": 30.0, **settings})
+
+
+def trip(breaker):
+    for _ in range(breaker.min_calls):
+        with pytest.raises(OSError):
+            breaker.call(fail)
+
+
+def test_stays_closed_below_min_calls(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        with pytest.raises(OSError):
+            breaker.call(fail)
+    assert breaker.state == CLOSED
+
+
+def test_opens_at_failure_rate_and_rejects(clock):
+    breaker = make_breaker()
+    breaker.call(lambda: "ok")
+    breaker.call(lambda: "ok")
+    with pytest.raises(OSError):
+        breaker.call(fail)
+    assert breaker.state == CLOSED
+    with pytest.raises(OSError):
+        breaker.call(fail)  # 2 of the last 4 calls failed
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "never called")
+    assert breaker.counts["rejected"] == 1
+
+
+def test_rolling_window_only_counts_recent_calls(clock):
+    breaker = make_breaker(window=4, min_calls=4, failure_rate=0.75)
+    for _ in range(4):
+        breaker.call(lambda: "ok")
+    for _ in range(2):
+        with pytest.raises(OSError):
+            breaker.call(fail)
+    assert breaker.state == CLOSED
+    with pytest.raises(OSError):
+        breaker.call(fail)  # 3 of the last 4 failed, though only 3 of 7 overall
+    assert breaker.state == OPEN
+    assert breaker.counts == {"success": 4, "failure": 3, "slow": 0, "rejected": 0}
+
+
+def test_slow_calls_count_as_bad(clock):
+    breaker = make_breaker(slow_call_seconds=5.0)
+
+    def slow():
+        clock.now += 6
+        return "late"
+
+    for _ in range(4):
+        assert breaker.call(slow) == "late"
+    assert breaker.state == OPEN
+    assert breaker.counts["slow"] == 4
+
+
+def test_half_open_probe_success_closes(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 31
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_failure_reopens(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 31
+    with pytest.raises(OSError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+    clock.now += 10
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "ok")
+
+
+def test_exempt_exceptions_propagate_but_count_as_success(clock):
+    breaker = make_breaker()
+    for _ in range(6):
+        with pytest.raises(ValueError):
+            breaker.call(lambda: int("bad input"), is_failure=lambda e: not isinstance(e, ValueError))
+    assert breaker.state == CLOSED
+    assert breaker.counts["success"] == 6
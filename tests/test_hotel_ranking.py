@@ -0,0 +1,121 @@
+import pytest
+
+from hotel_ranking import compact_hotel, convert_currency, parse_amenities, rank_hotels
+
+
+def offer(price, currency="USD", check_in="2026-11-01", check_out="2026-11-03", **extra):
+    return {"price": price, "currency": currency, "check_in": check_in, "check_out": check_out, **extra}
+
+
+def hotel(name, offers, rating=None, reviews=None, amenities=None):
+    return {"name": name, "offers": offers, "google_rating": rating, "google_reviews": reviews,
+            "amenities": amenities}
+
+
+def names(ranked):
+    return [h["name"] for h in ranked]
+
+
+@pytest.mark.parametrize("wishes, codes, unrecognised", [
+    ("wifi, pool", ["WIFI", "SWIMMING_POOL"], []),
+    ("free wifi, breakfast included", ["WIFI", "BREAKFAST"], []),
+    ("Free Wi-Fi", ["WIFI"], []),
+    ("SPA, TENNIS", ["SPA", "TENNIS"], []),
+    (["family", "wheelchair access"], ["KIDS_WELCOME", "DISABLED_FACILITIES"], []),
+    ("spacious, carpets", [], ["spacious", "carpets"]),
+    ("rooftop view, gym", ["FITNESS_CENTER"], ["rooftop view"]),
+    ("wifi, internet", ["WIFI"], []),
+    ("", [], []),
+    (None, [], []),
+])
+def test_parse_amenities(wishes, codes, unrecognised):
+    assert parse_amenities(wishes) == (codes, unrecognised)
+
+
+def test_convert_currency():
+    assert convert_currency(100, "USD", "USD") == 100
+    assert convert_currency(92, "EUR", "USD") == pytest.approx(100)
+    assert convert_currency(100, "usd", "INR") == pytest.approx(8300)
+    assert convert_currency(100, "XXX", "USD") is None
+
+
+def test_price_per_night_and_cheapest_offer():
+    ranked = rank_hotels([hotel("A", [offer("300"), offer("200"), offer("184", "EUR")])])
+    best = ranked[0]
+    assert best["nights"] == 2
+    assert best["price_per_night"] == pytest.approx(100)
+    assert best["total_price"] == pytest.approx(200)
+    assert best["offers_compared"] == 3
+    assert best["price_range_per_night"] == [100.0, 150.0]
+
+
+def test_unknown_currency_offers_are_skipped():
+    hotels = [hotel("Unknown", [offer("10", "XXX")]), hotel("Mixed", [offer("10", "XXX"), offer("400")])]
+    ranked = rank_hotels(hotels)
+    assert names(ranked) == ["Mixed"]
+    assert ranked[0]["offers_compared"] == 1
+
+
+def test_budget_filters_by_per_night_price():
+    hotels = [hotel("Cheap", [offer("180")]), hotel("Pricey", [offer("400")]),
+              hotel("Split", [offer("600"), offer("190")])]
+    ranked = rank_hotels(hotels, max_price_per_night=100)
+    assert names(ranked) == ["Cheap", "Split"]
+    assert ranked[1]["price_per_night"] == 95
+
+
+def test_min_rating_drops_low_and_unrated_hotels():
+    hotels = [hotel("Good", [offer("200")], 4.6, 300), hotel("Poor", [offer("200")], 3.9, 300),
+              hotel("Unrated", [offer("100")])]
+    assert names(rank_hotels(hotels, min_rating=4.5)) == ["Good"]
+
+
+def test_few_reviews_pull_rating_towards_average():
+    hotels = [hotel("Few", [offer("200")], 5.0, 2), hotel("Many", [offer("200")], 4.6, 2000),
+              hotel("Low", [offer("200")], 3.4, 2000)]
+    ranked = rank_hotels(hotels)
+    assert names(ranked) == ["Many", "Few", "Low"]
+    assert ranked[1]["weighted_rating"] < 4.6
+
+
+def test_unrated_hotel_gets_no_weighted_rating():
+    ranked = rank_hotels([hotel("Unrated", [offer("100")]), hotel("Rated", [offer("100")], 4.5, 100)])
+    unrated = next(h for h in ranked if h["name"] == "Unrated")
+    assert "weighted_rating" not in unrated
+    assert compact_hotel(unrated)["google_rating"] == "unavailable"
+    assert names(ranked) == ["Rated", "Unrated"]
+
+
+def test_amenity_wishes_match_hotel_codes_boards_and_descriptions():
+    hotels = [
+        hotel("Board", [offer("200", board_type="ROOM_ONLY"), offer("240", board_type="HALF_BOARD")],
+              4.0, 100, ["WIFI"]),
+        hotel("Described", [offer("200", description="Double room, free wifi and breakfast")], 4.0, 100),
+        hotel("Spacious", [offer("200", description="Spacious room with carpets")], 4.0, 100),
+    ]
+    ranked = rank_hotels(hotels, amenities="free wifi, breakfast included, rooftop view")
+    by_name = {h["name"]: h for h in ranked}
+    # the breakfast offer is preferred over the cheaper room-only one
+    assert by_name["Board"]["best_offer"] == {"board_type": "HALF_BOARD"}
+    assert by_name["Board"]["matched_amenities"] == ["WIFI", "BREAKFAST"]
+    assert by_name["Described"]["matched_amenities"] == ["WIFI", "BREAKFAST"]
+    assert by_name["Spacious"]["missing_amenities"] == ["WIFI", "BREAKFAST"]
+    assert all(h["unchecked_amenities"] == ["rooftop view"] for h in ranked)
+    # same price, so the full amenity match wins
+    assert names(ranked).index("Described") < names(ranked).index("Spacious")
+
+
+def test_description_words_do_not_match_inside_other_words():
+    hotels = [hotel("Spacious", [offer("200", description="Spacious room, barrier-free, carpets")], 4.5, 100),
+              hotel("Spa", [offer("200")], 4.5, 100, ["SPA"])]
+    ranked = rank_hotels(hotels, amenities="spa")
+    assert names(ranked) == ["Spa", "Spacious"]
+    assert ranked[1]["matched_amenities"] == []
+
+
+def test_limit_and_records_from_before_multi_offer_support():
+    hotels = [{"name": f"H{i}", "price": str(100 + i), "currency": "USD",
+               "check_in": "2026-11-01", "check_out": "2026-11-02"} for i in range(8)]
+    ranked = rank_hotels(hotels, limit=3)
+    assert names(ranked) == ["H0", "H1", "H2"]
+    assert rank_hotels(hotels, limit=None)[-1]["name"] == "H7"